@@ -1,10 +1,19 @@
 import os
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
-import alpaca_trade_api as tradeapi
-from alpaca_trade_api.rest import TimeFrame
+import aiohttp
+import websockets
+from tenacity import AsyncRetrying, retry_if_exception, wait_exponential, stop_after_attempt
+import numba
+import numpy as np
+import orjson
 import pandas as pd
 import logging
-import time
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
@@ -16,35 +25,430 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+TRADING_URL = 'https://paper-api.alpaca.markets'
+DATA_URL = 'https://data.alpaca.markets'
+DATA_STREAM_URL = 'wss://stream.data.alpaca.markets/v2/iex'
+TRADE_STREAM_URL = 'wss://paper-api.alpaca.markets/stream'
+BAR_BUF_SIZE = 256  # ring buffer capacity; bars arrive in order so no sorting needed
+
+
+def _is_transient(exc):
+    """Retry only failures that can succeed on a second attempt: connection
+    problems, timeouts, and 5xx. 4xx responses are real answers (e.g. the
+    404 that means "no open position") and must propagate immediately."""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status >= 500
+    return isinstance(exc, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+def build_entry_fn(rsi_threshold):
+    """Generate and compile the entry-signal predicate with the RSI threshold
+    baked in as a literal, so the hot path carries no attribute lookups and
+    the comparison chain can be const-folded."""
+    src = (
+        "def entry_fn(rsi, rsi_ma, prev_rsi, roc):\n"
+        f"    return rsi > {float(rsi_threshold)!r} and rsi > rsi_ma"
+        " and rsi > prev_rsi and roc > 0.0\n"
+    )
+    namespace = {}
+    exec(src, namespace)
+    return numba.njit(namespace['entry_fn'])
+
+
+@numba.njit(cache=True, fastmath=True)
+def rsi_roc_kernel(close, period):
+    """Single compiled pass over the close series computing Wilder RSI, its
+    10-period moving average, and 5-bar ROC, plus the final smoothed
+    gain/loss averages so the caller can continue updating incrementally."""
+    n = close.shape[0]
+    rsi = np.full(n, np.nan)
+    rsi_ma = np.full(n, np.nan)
+    roc = np.full(n, np.nan)
+    avg_gain = 0.0
+    avg_loss = 0.0
+    if n < period + 1:
+        return rsi, rsi_ma, roc, avg_gain, avg_loss
+
+    # Seed the averages from the first `period` deltas
+    for i in range(1, period + 1):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    avg_gain /= period
+    avg_loss /= period
+    rsi[period] = 100 - 100 / (1 + avg_gain / max(avg_loss, 1e-9))
+
+    # Wilder's recursive smoothing for the rest of the series
+    for i in range(period + 1, n):
+        delta = close[i] - close[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+        rsi[i] = 100 - 100 / (1 + avg_gain / max(avg_loss, 1e-9))
+
+    # 10-period SMA of RSI via a running sum
+    ma_window = 10
+    running = 0.0
+    for i in range(period, n):
+        running += rsi[i]
+        if i - period >= ma_window:
+            running -= rsi[i - ma_window]
+        if i - period >= ma_window - 1:
+            rsi_ma[i] = running / ma_window
+
+    # 5-bar rate of change, in percent (raw array expression, no per-element loop)
+    if n > 5:
+        roc[5:] = (close[5:] - close[:-5]) / close[:-5] * 100.0
+
+    return rsi, rsi_ma, roc, avg_gain, avg_loss
+
+
+@dataclass(slots=True)
+class Account:
+    """Account snapshot with numeric fields parsed once at ingestion"""
+    status: str
+    buying_power: float
+
+    @classmethod
+    def from_raw(cls, raw):
+        return cls(status=raw['status'], buying_power=float(raw['buying_power']))
+
+
+@dataclass(slots=True)
+class Position:
+    """Open position with numeric fields parsed once at ingestion"""
+    symbol: str
+    qty: float
+    market_value: float
+
+    @classmethod
+    def from_raw(cls, raw):
+        return cls(symbol=raw['symbol'], qty=float(raw['qty']),
+                   market_value=float(raw['market_value']))
+
+
+@dataclass(slots=True)
+class Trade:
+    """Latest trade with the price parsed once at ingestion"""
+    price: float
+
+    @classmethod
+    def from_raw(cls, raw):
+        return cls(price=float(raw['p']))
+
+
+@dataclass(slots=True)
+class Order:
+    """Order state with numeric fields parsed once at ingestion"""
+    id: str
+    status: str
+    filled_avg_price: float
+    legs: list = field(default_factory=list)
+
+    @classmethod
+    def from_raw(cls, raw):
+        return cls(id=raw['id'], status=raw['status'],
+                   filled_avg_price=float(raw['filled_avg_price'] or 0.0),
+                   legs=[cls.from_raw(leg) for leg in raw.get('legs') or []])
+
+
+class StreamingIndicators:
+    """Fused incremental state for the strategy's indicators.
+
+    One update() call folds a new close into Wilder RSI, the 10-period
+    RSI moving average (running sum over a small circular buffer), and
+    the 5-bar ROC in a single pass - no arrays are materialized and the
+    consumers read back plain scalars.
+    """
+
+    __slots__ = ('period', 'avg_gain', 'avg_loss', 'last_close', 'last_bar_id',
+                 'rsi', 'prev_rsi', 'rsi_ma', 'roc',
+                 'rsi_ma_buf', 'rsi_ma_sum', 'close_hist')
+
+    ROC_PERIOD = 5
+    MA_WINDOW = 10
+
+    def __init__(self, period=14):
+        self.period = period
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.last_close = float('nan')
+        self.last_bar_id = None
+        self.rsi = float('nan')
+        self.prev_rsi = float('nan')
+        self.rsi_ma = float('nan')
+        self.roc = float('nan')
+        self.rsi_ma_buf = deque(maxlen=self.MA_WINDOW)
+        self.rsi_ma_sum = 0.0
+        self.close_hist = deque(maxlen=self.ROC_PERIOD + 1)
+
+    @classmethod
+    def seeded(cls, close, period=14, bar_id=None):
+        """Build the streaming state from a full-history kernel pass"""
+        rsi_arr, rsi_ma_arr, roc_arr, avg_gain, avg_loss = rsi_roc_kernel(close, period)
+        self = cls(period)
+        self.avg_gain = avg_gain
+        self.avg_loss = avg_loss
+        self.last_close = float(close[-1])
+        self.last_bar_id = bar_id
+        self.rsi = float(rsi_arr[-1])
+        self.prev_rsi = float(rsi_arr[-2])
+        self.roc = float(roc_arr[-1])
+        self.rsi_ma_buf.extend(rsi_arr[period:][-self.MA_WINDOW:])
+        self.rsi_ma_sum = float(sum(self.rsi_ma_buf))
+        self.rsi_ma = self.rsi_ma_sum / len(self.rsi_ma_buf)
+        self.close_hist.extend(close[-(self.ROC_PERIOD + 1):])
+        return self
+
+    def update(self, close, bar_id=None):
+        """Fold one new close into all indicators in O(1)"""
+        delta = close - self.last_close
+        gain = max(delta, 0.0)
+        loss = max(-delta, 0.0)
+        self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+        self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        self.prev_rsi = self.rsi
+        self.rsi = 100 - 100 / (1 + self.avg_gain / max(self.avg_loss, 1e-9))
+
+        # Running-sum moving average of RSI
+        if len(self.rsi_ma_buf) == self.MA_WINDOW:
+            self.rsi_ma_sum -= self.rsi_ma_buf[0]
+        self.rsi_ma_buf.append(self.rsi)
+        self.rsi_ma_sum += self.rsi
+        self.rsi_ma = self.rsi_ma_sum / len(self.rsi_ma_buf)
+
+        # ROC against the close ROC_PERIOD bars back
+        self.close_hist.append(close)
+        if len(self.close_hist) == self.ROC_PERIOD + 1:
+            base = self.close_hist[0]
+            self.roc = (close - base) / base * 100
+        else:
+            self.roc = float('nan')
+
+        self.last_close = close
+        self.last_bar_id = bar_id
+        return self.rsi, self.rsi_ma, self.roc
+
+    def latest(self):
+        """Current indicator scalars in the shape the entry check consumes"""
+        return {'rsi': self.rsi, 'rsi_ma': self.rsi_ma,
+                'prev_rsi': self.prev_rsi, 'roc': self.roc}
+
+
+class AsyncAlpaca:
+    """Minimal async Alpaca REST client sharing one aiohttp session for all calls"""
+
+    def __init__(self, api_key, api_secret, base_url=TRADING_URL, data_url=DATA_URL):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.base_url = base_url
+        self.data_url = data_url
+        self._session = None
+        self._refs = 0
+        self.last_timings = {}
+        # TTL cache for pure, side-effect-free reads whose answers are stable
+        # for a while (market clock, account, closed-day bars)
+        self._cache = {}
+
+    def _trace_config(self):
+        """Trace connect time and TTFB per request so latency regressions show up in logs"""
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.start = asyncio.get_running_loop().time()
+            ctx.connect_ms = 0.0  # stays 0 when a pooled connection is reused
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.conn_start = asyncio.get_running_loop().time()
+
+        async def on_connection_create_end(session, ctx, params):
+            ctx.connect_ms = (asyncio.get_running_loop().time() - ctx.conn_start) * 1000
+
+        async def on_request_end(session, ctx, params):
+            ttfb_ms = (asyncio.get_running_loop().time() - ctx.start) * 1000
+            self.last_timings = {'connect_ms': ctx.connect_ms, 'ttfb_ms': ttfb_ms}
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_start.append(on_connection_create_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_request_end.append(on_request_end)
+        return trace
+
+    async def __aenter__(self):
+        # One keep-alive session shared by every caller; the pool is sized so
+        # several bots (one per symbol) can multiplex over it without blocking.
+        # Reference-counted so the first user opens it and the last closes it.
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(keepalive_timeout=60, limit=64,
+                                               limit_per_host=32),
+                headers={
+                    'APCA-API-KEY-ID': self.api_key,
+                    'APCA-API-SECRET-KEY': self.api_secret,
+                },
+                trace_configs=[self._trace_config()]
+            )
+        self._refs += 1
+        return self
+
+    async def warm_up(self):
+        """Complete the TCP/TLS handshake before the trading loop starts and log latency"""
+        await self.clock()
+        t = self.last_timings
+        logger.info(f"Connection warm-up: connect={t.get('connect_ms', 0):.1f}ms "
+                    f"ttfb={t.get('ttfb_ms', 0):.1f}ms")
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._refs -= 1
+        if self._refs <= 0:
+            await self._session.close()
+
+    async def _do_request(self, method, url, **kwargs):
+        async with self._session.request(method, url, **kwargs) as resp:
+            resp.raise_for_status()
+            body = await resp.read()
+            # orjson decodes the raw bytes several times faster than
+            # the stdlib json aiohttp would use; cancels come back 204/empty
+            return orjson.loads(body) if body else None
+
+    async def _request(self, method, url, retry=True, **kwargs):
+        """Issue a request with exponential-backoff retries on transient failures.
+
+        Pass retry=False for non-idempotent calls (order submission), where a
+        lost response must not trigger a resend.
+        """
+        if not retry:
+            return await self._do_request(method, url, **kwargs)
+        async for attempt in AsyncRetrying(retry=retry_if_exception(_is_transient),
+                                           wait=wait_exponential(),
+                                           stop=stop_after_attempt(5),
+                                           reraise=True):
+            with attempt:
+                return await self._do_request(method, url, **kwargs)
+
+    async def _cached(self, key, ttl, fetch):
+        """Return a cached response for `key` if younger than `ttl` seconds,
+        otherwise fetch and cache it"""
+        now = time.monotonic()
+        hit = self._cache.get(key)
+        if hit is not None and now - hit[0] < ttl:
+            return hit[1]
+        value = await fetch()
+        self._cache[key] = (now, value)
+        return value
+
+    async def clock(self):
+        return await self._cached(
+            'clock', 30,
+            lambda: self._request('GET', f'{self.base_url}/v2/clock'))
+
+    async def account(self):
+        async def fetch():
+            raw = await self._request('GET', f'{self.base_url}/v2/account')
+            return Account.from_raw(raw)
+
+        return await self._cached('account', 60, fetch)
+
+    async def position(self, symbol):
+        """Return the open position for symbol, or None if there is none"""
+        try:
+            raw = await self._request('GET', f'{self.base_url}/v2/positions/{symbol}')
+            return Position.from_raw(raw)
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    async def latest_trade(self, symbol):
+        payload = await self._request('GET', f'{self.data_url}/v2/stocks/{symbol}/trades/latest')
+        return Trade.from_raw(payload['trade'])
+
+    async def bars(self, symbol, timeframe='1Day', **params):
+        params['timeframe'] = timeframe
+
+        async def fetch():
+            payload = await self._request(
+                'GET', f'{self.data_url}/v2/stocks/{symbol}/bars', params=params)
+            return payload.get('bars') or []
+
+        # Historical bars never change once a trading day closes, so the same
+        # (symbol, timeframe, start, end) request can be served from cache
+        key = ('bars', symbol, timeframe, params.get('start'), params.get('end'))
+        return await self._cached(key, 3600, fetch)
+
+    async def submit_order(self, **order):
+        # Single attempt: retrying a POST whose response was lost would submit
+        # a duplicate order. The client_order_id lets a lost response be
+        # reconciled server-side instead of resent.
+        order.setdefault('client_order_id', uuid.uuid4().hex)
+        raw = await self._request('POST', f'{self.base_url}/v2/orders',
+                                  retry=False, json=order)
+        return Order.from_raw(raw)
+
+    async def get_order(self, order_id):
+        raw = await self._request('GET', f'{self.base_url}/v2/orders/{order_id}')
+        return Order.from_raw(raw)
+
+    async def cancel_order(self, order_id):
+        # DELETE is idempotent, so the transient-failure retries are safe
+        await self._request('DELETE', f'{self.base_url}/v2/orders/{order_id}')
+
 
 class TrendFollowingBot:
-    def __init__(self, trailing_stop_percent=0.05, order_wait_timeout=60):
+    def __init__(self, trailing_stop_percent=0.05, order_wait_timeout=60, rsi_threshold=50,
+                 api=None):
         load_dotenv()
         self.api_key = os.getenv('APCA_API_KEY_ID')
         self.api_secret = os.getenv('APCA_API_SECRET_KEY')
         self.trailing_stop_percent = trailing_stop_percent
         self.order_wait_timeout = order_wait_timeout
+        self.rsi_threshold = rsi_threshold
+        # Entry parameters are fixed for the bot's lifetime, so specialize the
+        # signal check once at construction
+        self._entry_fn = build_entry_fn(rsi_threshold)
         self.active_positions = {}
 
+        # Live market state fed by the WebSocket stream; REST is only a cold-start
+        # fallback. Bars live in a fixed-size struct-of-arrays ring buffer so
+        # appends are O(1) writes and the indicator code reads plain ndarrays.
+        self._buf = {k: np.zeros(BAR_BUF_SIZE, dtype=np.float64)
+                     for k in ('open', 'high', 'low', 'close', 'volume')}
+        self._ts = np.zeros(BAR_BUF_SIZE, dtype='datetime64[ns]')
+        self._head = 0
+        self._last_trade_price = None
+        # Lets the stream cut the inter-check sleep short when a new bar prints
+        self._wake = asyncio.Event()
+
+        # Order lifecycle events pushed over the trade_updates stream
+        self._order_events = {}
+        self._order_state = {}
+
+        # Fused streaming indicator state so each new bar is one O(1) update
+        self._indicators = None
+
+        # History request date strings, recomputed only when the day rolls over
+        self._cached_date_strs = None
+
         # Initialize timezone (US/Eastern for market hours)
         self.timezone = ZoneInfo("America/New_York")
 
         if not all([self.api_key, self.api_secret]):
             raise ValueError("API credentials not found in environment variables")
 
-        self.api = tradeapi.REST(
-            self.api_key,
-            self.api_secret,
-            base_url='https://paper-api.alpaca.markets'
-        )
-        self.validate_api_connection()
+        # A shared client can be passed in when running several bots (one per
+        # symbol) so they all ride the same connection pool and caches
+        self.api = api or AsyncAlpaca(self.api_key, self.api_secret, base_url=TRADING_URL)
 
-    def validate_api_connection(self):
+    async def validate_api_connection(self):
         """Validate API connection and log account information"""
         try:
-            account = self.api.get_account()
+            account = await self.api.account()
             logger.info(f"Connected to Alpaca. Account status: {account.status}")
-            logger.info(f"Buying power: ${float(account.buying_power):.2f}")
+            logger.info(f"Buying power: ${account.buying_power:.2f}")
             return account
         except Exception as e:
             logger.error(f"Failed to connect to Alpaca API: {e}")
@@ -53,135 +457,258 @@ class TrendFollowingBot:
     def get_current_market_time(self):
         """Get current market time in US/Eastern"""
         current_time = datetime.now(self.timezone)
-        logger.info(f"Current market time: {current_time}")
+        logger.info("Current market time: %s", current_time)
         return current_time
 
-    def get_latest_price(self, symbol):
-        """Get latest price for a symbol with proper error handling"""
+    async def _stream(self, symbol):
+        """Subscribe to Alpaca's data stream and feed live trades/bars into the bot"""
+        while True:
+            try:
+                async with websockets.connect(DATA_STREAM_URL) as ws:
+                    await ws.send(json.dumps({
+                        'action': 'auth', 'key': self.api_key, 'secret': self.api_secret
+                    }))
+                    # dailyBars matches the strategy's timeframe; the plain
+                    # 'bars' channel would deliver minute bars and corrupt the
+                    # daily series the indicators are seeded from
+                    await ws.send(json.dumps({
+                        'action': 'subscribe', 'dailyBars': [symbol], 'trades': [symbol]
+                    }))
+                    logger.info(f"Subscribed to data stream for {symbol}")
+                    async for raw in ws:
+                        for msg in orjson.loads(raw):
+                            if msg.get('T') == 't':
+                                self._last_trade_price = float(msg['p'])
+                            elif msg.get('T') == 'd':
+                                is_new = self._append_bar(msg['t'], msg['o'], msg['h'],
+                                                          msg['l'], msg['c'], msg['v'])
+                                # Only cut the sleep short when a new day's bar
+                                # starts; intraday updates of the current bar
+                                # keep the regular cadence
+                                if is_new:
+                                    self._wake.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Data stream error: {e} - reconnecting in 5 seconds")
+                await asyncio.sleep(5)
+
+    async def _trade_updates_stream(self):
+        """Listen to Alpaca's trade_updates stream and resolve order waiters"""
+        while True:
+            try:
+                async with websockets.connect(TRADE_STREAM_URL) as ws:
+                    await ws.send(json.dumps({
+                        'action': 'authenticate',
+                        'data': {'key_id': self.api_key, 'secret_key': self.api_secret}
+                    }))
+                    await ws.send(json.dumps({
+                        'action': 'listen',
+                        'data': {'streams': ['trade_updates']}
+                    }))
+                    logger.info("Listening for trade updates")
+                    async for raw in ws:
+                        msg = orjson.loads(raw)
+                        if msg.get('stream') != 'trade_updates':
+                            continue
+                        update = msg['data']
+                        if update.get('event') not in ('fill', 'canceled', 'expired', 'rejected'):
+                            continue
+                        order = Order.from_raw(update['order'])
+                        self._order_state[order.id] = order
+                        self._order_events.setdefault(order.id, asyncio.Event()).set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Trade updates stream error: {e} - reconnecting in 5 seconds")
+                await asyncio.sleep(5)
+
+    def _append_bar(self, ts, open_, high, low, close, volume):
+        """O(1) upsert of one bar into the ring buffer.
+
+        A bar with the same timestamp as the last one overwrites it in place
+        (the stream re-sends the current day's bar as it updates); a new
+        timestamp appends. Returns True when a new bar was appended.
+        """
+        ts64 = pd.Timestamp(ts).to_datetime64()
+        is_new = not (self._head > 0
+                      and self._ts[(self._head - 1) % BAR_BUF_SIZE] == ts64)
+        slot = (self._head if is_new else self._head - 1) % BAR_BUF_SIZE
+        self._buf['open'][slot] = open_
+        self._buf['high'][slot] = high
+        self._buf['low'][slot] = low
+        self._buf['close'][slot] = close
+        self._buf['volume'][slot] = volume
+        self._ts[slot] = ts64
+        if is_new:
+            self._head += 1
+        return is_new
+
+    def _bar_count(self):
+        return min(self._head, BAR_BUF_SIZE)
+
+    def _bar_window(self, field, n=100):
+        """Last n values of a bar field as a contiguous array, handling wrap-around"""
+        n = min(n, self._bar_count())
+        if n == 0:
+            return None
+        idx = np.arange(self._head - n, self._head) % BAR_BUF_SIZE
+        return np.take(self._buf[field], idx)
+
+    async def bootstrap_history(self, symbol, limit=100):
+        """Cold-start: seed the bar buffer over REST before the stream takes over"""
+        raw_bars = await self.get_historical_data(symbol, limit)
+        if raw_bars is None:
+            return
+        self._head = 0
+        for bar in raw_bars:
+            self._append_bar(bar['t'], bar['o'], bar['h'],
+                             bar['l'], bar['c'], bar['v'])
+
+    async def get_latest_price(self, symbol):
+        """Get latest price, preferring the live stream over a REST round trip"""
+        if self._last_trade_price is not None:
+            return self._last_trade_price
         try:
-            latest_trade = self.api.get_latest_trade(symbol)
-            return float(latest_trade.price)
+            latest_trade = await self.api.latest_trade(symbol)
+            return latest_trade.price
         except Exception as e:
             logger.error(f"Error getting latest price for {symbol}: {e}")
             return None
 
-    def get_historical_data(self, symbol, limit=100):
-        """Get historical data ensuring we only request actual historical dates"""
-        try:
-            current_time = self.get_current_market_time()
+    def _history_date_range(self, limit):
+        """Start/end date strings for the history request.
+
+        The pair only changes when the trading day rolls over, so the
+        strftime work is cached instead of re-run on every call.
+        """
+        current_time = datetime.now(self.timezone)
 
-            # Calculate end date as the last completed trading day
-            end = current_time.replace(hour=16, minute=0, second=0, microsecond=0)
-            if current_time.hour < 16:  # If before market close, use previous day
-                end -= timedelta(days=1)
+        # End date is the last completed trading day
+        end = current_time.replace(hour=16, minute=0, second=0, microsecond=0)
+        if current_time.hour < 16:  # If before market close, use previous day
+            end -= timedelta(days=1)
 
-            # Calculate start date
-            start = end - timedelta(days=limit)
+        key = (end.date(), limit)
+        cached = self._cached_date_strs
+        if cached is not None and cached[2] == key:
+            return cached[0], cached[1]
+
+        start = end - timedelta(days=limit)
+        start_str = start.strftime('%Y-%m-%d')
+        end_str = end.strftime('%Y-%m-%d')
+        self._cached_date_strs = (start_str, end_str, key)
+        return start_str, end_str
+
+    async def get_historical_data(self, symbol, limit=100):
+        """Get historical data ensuring we only request actual historical dates"""
+        try:
+            start_str, end_str = self._history_date_range(limit)
 
-            logger.info(f"Requesting historical data from {start} to {end}")
+            logger.info("Requesting historical data from %s to %s", start_str, end_str)
 
             # Get historical data
-            bars = self.api.get_bars(
+            raw_bars = await self.api.bars(
                 symbol,
-                TimeFrame.Day,
-                start=start.strftime('%Y-%m-%d'),
-                end=end.strftime('%Y-%m-%d'),
+                timeframe='1Day',
+                start=start_str,
+                end=end_str,
                 limit=limit,
                 adjustment='raw'  # Get raw prices without adjustments
-            ).df
+            )
 
-            if bars.empty:
+            if not raw_bars:
                 logger.warning(f"No data received for {symbol}")
                 return None
 
-            # Reset index to make timestamp a column
-            bars = bars.reset_index()
-
-            # Convert timestamps to Eastern time
-            bars['timestamp'] = pd.to_datetime(bars['timestamp']).dt.tz_convert(self.timezone)
-
-            # Sort by timestamp and get the latest limit days
-            bars = bars.sort_values('timestamp').tail(limit).reset_index(drop=True)
+            # Alpaca returns bars already time-sorted, so just trim to the
+            # latest `limit` - no DataFrame, sort, or index reset needed
+            raw_bars = raw_bars[-limit:]
 
-            latest_price = self.get_latest_price(symbol)
             logger.info(f"""Historical Data Summary:
-- Retrieved {len(bars)} bars
-- Date Range: {bars['timestamp'].iloc[0]} to {bars['timestamp'].iloc[-1]}
-- Latest Market Price: ${latest_price:.2f}""")
+- Retrieved {len(raw_bars)} bars
+- Date Range: {raw_bars[0]['t']} to {raw_bars[-1]['t']}""")
 
-            return bars
+            return raw_bars
 
         except Exception as e:
             logger.error(f"Error fetching historical data for {symbol}: {str(e)}")
             return None
 
-    def calculate_rsi(self, data, period=14):
-        """Calculate RSI and additional technical indicators"""
+    def calculate_rsi(self, close, period=14, bar_id=None):
+        """Calculate RSI, its moving average, and ROC, updating incrementally.
+
+        Takes the close-price array straight from the ring buffer plus the
+        buffer's bar counter, which identifies bars unambiguously (a close
+        equal to the previous one is still a new bar). The full history is
+        scanned once through the compiled kernel to seed the streaming state;
+        after that each new bar costs one fused O(1) update instead of
+        re-running rolling windows over the history.
+        """
         try:
-            if data is None or len(data) < period:
+            if close is None or len(close) < period + 1:
                 logger.warning(f"Insufficient data for RSI calculation. Need at least {period} periods.")
                 return None
 
-            delta = data['close'].diff(1)
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-
-            avg_gain = gain.rolling(window=period, min_periods=period).mean()
-            avg_loss = loss.rolling(window=period, min_periods=period).mean()
+            state = self._indicators
 
-            # Handle division by zero
-            avg_loss = avg_loss.replace(0, 0.000001)
+            if (state is not None and bar_id is not None
+                    and bar_id == state.last_bar_id
+                    and close[-1] == state.last_close):
+                pass  # same bar, unchanged - reuse the cached values
+            elif (state is not None and bar_id is not None
+                    and bar_id == state.last_bar_id + 1
+                    and close[-2] == state.last_close):
+                state.update(close[-1], bar_id)
+            else:
+                # First call, current bar revised in place, or history
+                # changed under us - reseed from scratch
+                self._indicators = StreamingIndicators.seeded(close, period, bar_id)
 
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
+            indicators = self._indicators.latest()
 
-            # Add moving average of RSI for trend confirmation
-            data['RSI'] = rsi
-            data['RSI_MA'] = data['RSI'].rolling(window=10).mean()
+            # Only pay the float-formatting cost when someone is listening
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"""Technical Indicators:
+- RSI: {indicators['rsi']:.2f}
+- RSI MA: {indicators['rsi_ma']:.2f}
+- 5-day ROC: {indicators['roc']:.2f}%""")
 
-            # Calculate ROC (Rate of Change) for additional momentum confirmation
-            data['ROC'] = data['close'].pct_change(5) * 100
-
-            latest_price = self.get_latest_price(data.index[-1])
-            logger.info(f"""Technical Indicators:
-- RSI: {rsi.iloc[-1]:.2f}
-- RSI MA: {data['RSI_MA'].iloc[-1]:.2f}
-- 5-day ROC: {data['ROC'].iloc[-1]:.2f}%
-- Current Price: ${latest_price:.2f}""")
-
-            return data
+            return indicators
 
         except Exception as e:
             logger.error(f"Error calculating RSI: {str(e)}")
             return None
 
-    def check_entry_signal(self, data, rsi_threshold=50):
+    def check_entry_signal(self, close, bar_id=None):
         """Check if entry conditions are met"""
         try:
-            if data is None:
+            if close is None:
                 logger.warning("No data available for entry signal check")
                 return False
 
-            data = self.calculate_rsi(data)
-            if data is None:
+            indicators = self.calculate_rsi(close, bar_id=bar_id)
+            if indicators is None:
                 return False
 
-            current_rsi = data['RSI'].iloc[-1]
-            current_rsi_ma = data['RSI_MA'].iloc[-1]
-            prev_rsi = data['RSI'].iloc[-2]
-            current_roc = data['ROC'].iloc[-1]
+            current_rsi = indicators['rsi']
+            current_rsi_ma = indicators['rsi_ma']
+            prev_rsi = indicators['prev_rsi']
+            current_roc = indicators['roc']
 
-            # Enhanced entry conditions
-            rsi_strong = current_rsi > rsi_threshold
-            rsi_trending_up = current_rsi > current_rsi_ma
-            momentum_increasing = current_rsi > prev_rsi
-            positive_momentum = current_roc > 0
+            # Specialized predicate with the threshold baked in at construction
+            entry_signal = bool(self._entry_fn(current_rsi, current_rsi_ma,
+                                               prev_rsi, current_roc))
 
-            entry_signal = (rsi_strong and rsi_trending_up and
-                            momentum_increasing and positive_momentum)
+            # Per-condition breakdown, built only when the log level is live
+            if logger.isEnabledFor(logging.INFO):
+                rsi_strong = current_rsi > self.rsi_threshold
+                rsi_trending_up = current_rsi > current_rsi_ma
+                momentum_increasing = current_rsi > prev_rsi
+                positive_momentum = current_roc > 0
 
-            logger.info(f"""Entry Signal Analysis:
-RSI > Threshold: {rsi_strong} ({current_rsi:.2f} vs {rsi_threshold})
+                logger.info(f"""Entry Signal Analysis:
+RSI > Threshold: {rsi_strong} ({current_rsi:.2f} vs {self.rsi_threshold})
 RSI > MA: {rsi_trending_up} ({current_rsi:.2f} vs {current_rsi_ma:.2f})
 RSI Increasing: {momentum_increasing} ({prev_rsi:.2f} to {current_rsi:.2f})
 ROC Positive: {positive_momentum} ({current_roc:.2f}%)
@@ -193,23 +720,27 @@ Final Signal: {"YES" if entry_signal else "NO"}""")
             logger.error(f"Error checking entry signal: {str(e)}")
             return False
 
-    def check_position(self, symbol):
+    async def check_position(self, symbol):
         """Check if we have an existing position with current market value"""
         try:
-            position = self.api.get_position(symbol)
-            current_price = self.get_latest_price(symbol)
-            qty = float(position.qty)
-            market_value = qty * current_price if current_price else float(position.market_value)
+            position = await self.api.position(symbol)
+            if position is None:
+                return 0, 0
+            current_price = await self.get_latest_price(symbol)
+            qty = position.qty
+            market_value = qty * current_price if current_price else position.market_value
             return qty, market_value
         except:
             return 0, 0
 
-    def calculate_position_size(self, symbol):
+    async def calculate_position_size(self, symbol):
         """Calculate appropriate position size based on account value and risk"""
         try:
-            account = self.api.get_account()
-            buying_power = float(account.buying_power)
-            current_price = self.get_latest_price(symbol)
+            account, current_price = await asyncio.gather(
+                self.api.account(),
+                self.get_latest_price(symbol)
+            )
+            buying_power = account.buying_power
 
             if not current_price:
                 logger.error("Unable to get current price for position sizing")
@@ -219,7 +750,8 @@ Final Signal: {"YES" if entry_signal else "NO"}""")
             max_position_value = buying_power * 0.05
             position_size = int(max_position_value / current_price)
 
-            logger.info(f"""Position Size Calculation:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"""Position Size Calculation:
 - Buying Power: ${buying_power:.2f}
 - Current Price: ${current_price:.2f}
 - Max Position Value: ${max_position_value:.2f}
@@ -230,85 +762,112 @@ Final Signal: {"YES" if entry_signal else "NO"}""")
             logger.error(f"Error calculating position size: {str(e)}")
             return 1
 
-    def wait_for_order_fill(self, order_id, timeout=None):
-        """Wait for an order to be filled, with timeout"""
+    async def wait_for_order_fill(self, order_id, timeout=None):
+        """Await the terminal event for an order pushed over trade_updates.
+
+        One WebSocket message replaces up to timeout-many REST round trips
+        of status polling; the stream handler sets the per-order event as
+        soon as Alpaca reports the fill, even if it lands before we wait.
+        """
         if timeout is None:
             timeout = self.order_wait_timeout
 
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                order = self.api.get_order(order_id)
-                if order.status == 'filled':
-                    return order
-                elif order.status in ['canceled', 'expired', 'rejected']:
-                    logger.error(f"Order failed with status: {order.status}")
-                    return None
-                time.sleep(1)
-            except Exception as e:
-                logger.error(f"Error checking order status: {e}")
-                return None
+        event = self._order_events.setdefault(order_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Order fill timeout after {timeout} seconds")
+            return None
+        finally:
+            self._order_events.pop(order_id, None)
 
-        logger.error(f"Order fill timeout after {timeout} seconds")
-        return None
+        order = self._order_state.pop(order_id)
+        if order.status != 'filled':
+            logger.error(f"Order failed with status: {order.status}")
+            return None
+        return order
 
-    def place_trailing_stop_order(self, symbol, qty):
-        """Place a market buy order followed by a trailing stop sell order"""
+    async def place_trailing_stop_order(self, symbol, qty):
+        """Enter a position with a stop leg attached, then convert the stop
+        into a real trailing stop once the fill lands"""
         try:
             # Check existing position
-            current_qty, current_value = self.check_position(symbol)
+            current_qty, current_value = await self.check_position(symbol)
             if current_qty > 0:
                 logger.info(f"Already have position of {current_qty} shares in {symbol}")
                 return None
 
             # Calculate position size and verify current price
-            qty = self.calculate_position_size(symbol)
-            current_price = self.get_latest_price(symbol)
+            qty, current_price = await asyncio.gather(
+                self.calculate_position_size(symbol),
+                self.get_latest_price(symbol)
+            )
 
             if not current_price:
                 logger.error("Unable to get current price for order placement")
                 return None
 
-            # Place entry order
-            entry_order = self.api.submit_order(
+            # One POST: market buy with the stop leg attached server-side, so
+            # the exit is in place the moment the entry fills and no second
+            # submit (or fill-poll in between) sits on the critical path.
+            # Alpaca's advanced order classes don't accept a trailing-stop
+            # child, so the leg is a plain stop that only bridges the gap
+            # until the fill lands and a real trailing stop replaces it below.
+            stop_price = round(current_price * (1 - self.trailing_stop_percent), 2)
+            entry_order = await self.api.submit_order(
                 symbol=symbol,
                 qty=qty,
                 side='buy',
                 type='market',
-                time_in_force='gtc'
+                time_in_force='gtc',
+                order_class='oto',
+                stop_loss={'stop_price': stop_price}
             )
 
-            logger.info(f"Entry order placed: {entry_order.id}")
+            logger.info(f"Entry order placed with attached stop: {entry_order.id}")
 
-            # Wait for entry order to fill
-            filled_entry = self.wait_for_order_fill(entry_order.id)
+            # Off the critical path now - only needed to record the fill price
+            filled_entry = await self.wait_for_order_fill(entry_order.id)
             if not filled_entry:
                 logger.error("Entry order failed to fill")
                 return None
 
-            filled_price = float(filled_entry.filled_avg_price)
-            logger.info(f"Entry order filled at ${filled_price:.2f}")
-
-            # Place trailing stop order
-            trailing_stop_order = self.api.submit_order(
-                symbol=symbol,
-                qty=qty,
-                side='sell',
-                type='trailing_stop',
-                trail_percent=self.trailing_stop_percent * 100,
-                time_in_force='gtc'
-            )
-
+            filled_price = filled_entry.filled_avg_price
             order_value = filled_price * qty
-            stop_distance = filled_price * self.trailing_stop_percent
 
-            logger.info(f"""Order Summary:
+            # The attached leg is a static stop priced off the pre-fill quote
+            # and never trails. Swap it for the real thing now that the fill
+            # price is known: cancel the leg first so two exits can't both
+            # trigger, then submit a trailing stop that ratchets off the
+            # actual entry. If the swap fails, the static stop stays live.
+            trailing_order = None
+            try:
+                for leg in entry_order.legs:
+                    await self.api.cancel_order(leg.id)
+                trailing_order = await self.api.submit_order(
+                    symbol=symbol,
+                    qty=qty,
+                    side='sell',
+                    type='trailing_stop',
+                    trail_percent=round(self.trailing_stop_percent * 100, 2),
+                    time_in_force='gtc'
+                )
+                logger.info(f"Trailing stop order placed: {trailing_order.id}")
+            except aiohttp.ClientResponseError as e:
+                logger.error(f"Could not replace stop leg with trailing stop: {e}")
+
+            if trailing_order:
+                stop_desc = f"{self.trailing_stop_percent * 100}% trailing"
+            else:
+                stop_desc = f"static at ${stop_price:.2f} (trailing swap failed)"
+
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"""Order Summary:
 - Symbol: {symbol}
 - Quantity: {qty} shares
 - Entry Price: ${filled_price:.2f}
 - Total Value: ${order_value:.2f}
-- Trailing Stop: {self.trailing_stop_percent * 100}%
-- Stop Distance: ${stop_distance:.2f}""")
+- Stop: {stop_desc}""")
 
             # Track the position
             self.active_positions[symbol] = {
@@ -318,15 +877,20 @@ Final Signal: {"YES" if entry_signal else "NO"}""")
                 'stop_percent': self.trailing_stop_percent
             }
 
-            return filled_entry, trailing_stop_order
+            return filled_entry
 
         except Exception as e:
             logger.error(f"Error placing orders: {str(e)}")
             return None
 
-    def run_strategy(self, symbol, check_interval=300):
+    async def _run(self, symbol, check_interval=300):
         """Main strategy loop"""
-        logger.info(f"""
+        async with self.api:
+            # Warm the connection pool so the first real call doesn't pay the handshake
+            await self.api.warm_up()
+            await self.validate_api_connection()
+
+            logger.info(f"""
 Starting Trading Bot
 -------------------
 Symbol: {symbol}
@@ -336,48 +900,73 @@ Check Interval: {check_interval} seconds
 Market Time Zone: {self.timezone}
 """)
 
+            stream_tasks = [
+                asyncio.create_task(self._stream(symbol)),
+                asyncio.create_task(self._trade_updates_stream())
+            ]
+            try:
+                await self._loop(symbol, check_interval)
+            finally:
+                for task in stream_tasks:
+                    task.cancel()
+
+    async def _sleep_until_wake(self, timeout):
+        """Sleep up to `timeout` seconds, returning early if a new bar arrives"""
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            self._wake.clear()
+        except asyncio.TimeoutError:
+            pass
+
+    async def _loop(self, symbol, check_interval):
         while True:
             try:
                 # Get current market time
                 current_time = self.get_current_market_time()
 
-                # Check market hours
-                clock = self.api.get_clock()
-                if not clock.is_open:
-                    next_open = clock.next_open.astimezone(self.timezone)
+                # Check market hours first
+                clock = await self.api.clock()
+                if not clock['is_open']:
+                    next_open = datetime.fromisoformat(clock['next_open']).astimezone(self.timezone)
                     logger.info(f"Market is closed. Next opening at {next_open}")
                     sleep_time = min(check_interval, (next_open - current_time).seconds)
-                    time.sleep(sleep_time)
+                    await asyncio.sleep(sleep_time)
                     continue
 
-                # Get and validate data
-                data = self.get_historical_data(symbol)
-                if data is None or len(data) < 20:
+                # Bars come from the stream-fed ring buffer; only hit REST on a cold start
+                if self._bar_count() < 20:
+                    await self.bootstrap_history(symbol)
+                close = self._bar_window('close')
+
+                # Price and position still overlap their round trips
+                current_price, (current_qty, current_value) = await asyncio.gather(
+                    self.get_latest_price(symbol),
+                    self.check_position(symbol)
+                )
+
+                if close is None or len(close) < 20:
                     logger.warning("Insufficient data for analysis")
-                    time.sleep(300)
+                    await asyncio.sleep(300)
                     continue
 
-                # Get current market price
-                current_price = self.get_latest_price(symbol)
                 if not current_price:
                     logger.error("Unable to get current price")
-                    time.sleep(60)
+                    await asyncio.sleep(60)
                     continue
 
-                # Check current position
-                current_qty, current_value = self.check_position(symbol)
+                logger.info("Latest Market Price: $%.2f", current_price)
 
                 if current_qty == 0:
                     # Look for entry signals if no position
-                    if self.check_entry_signal(data):
+                    if self.check_entry_signal(close, bar_id=self._head):
                         logger.info("Entry signal confirmed - Placing orders")
-                        self.place_trailing_stop_order(symbol, qty=1)
+                        await self.place_trailing_stop_order(symbol, qty=1)
                     else:
                         logger.info("No entry signal detected - Waiting for next check")
                 else:
                     # Log position status if we have one
                     position_info = self.active_positions.get(symbol, {})
-                    if position_info:
+                    if position_info and logger.isEnabledFor(logging.INFO):
                         entry_price = position_info['entry_price']
                         pnl = (current_price - entry_price) * current_qty
                         pnl_percent = (pnl / (entry_price * current_qty)) * 100
@@ -392,16 +981,22 @@ Market Time Zone: {self.timezone}
 - Entry Time: {position_info['entry_time']}
 - Position Age: {position_age}""")
 
-                logger.info(f"Waiting {check_interval} seconds until next check...")
-                time.sleep(check_interval)
+                logger.info("Waiting %s seconds until next check...", check_interval)
+                await self._sleep_until_wake(check_interval)
 
-            except KeyboardInterrupt:
-                logger.info("Stopping bot...")
-                break
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Error in main loop: {str(e)}")
                 logger.error("Retrying in 5 minutes...")
-                time.sleep(300)
+                await asyncio.sleep(300)
+
+    def run_strategy(self, symbol, check_interval=300):
+        """Drive the async strategy loop"""
+        try:
+            asyncio.run(self._run(symbol, check_interval))
+        except KeyboardInterrupt:
+            logger.info("Stopping bot...")
 
 
 if __name__ == "__main__":
@@ -410,4 +1005,4 @@ if __name__ == "__main__":
         bot = TrendFollowingBot(trailing_stop_percent=0.05)  # 5% trailing stop
         bot.run_strategy("TSLA", check_interval=300)  # Check every 5 minutes
     except Exception as e:
-        logger.error(f"Fatal error: {str(e)}")
\ No newline at end of file
+        logger.error(f"Fatal error: {str(e)}")